@@ -0,0 +1,64 @@
+"""
+Poor man's encoders and decoders for 1D (UPC-A, EAN-13) and 2D barcodes.
+
+The symbologies are looked up in a registry and their modules are only imported on first use,
+so that importing the package stays cheap for short lived processes:
+
+    import barcodes
+    encoder = barcodes.get_symbology("upc-a")()
+    encoder.encode("13600029145")
+"""
+import importlib
+
+# Symbology name -> (module, class name). The module is imported the first time the symbology is asked for.
+SYMBOLOGIES = {
+    "upc-a": ("barcodes.upc", "PoorMans1DBarCodeEncoderDecoder_UPC_A"),
+    "ean-13": ("barcodes.ean", "PoorMans1DBarCodeEncoderDecoder_EAN_13"),
+    "upc-a-eps": ("barcodes.upc_eps", "PoorMans1DBarCodeEncoderDecoder_UPC_A"),
+}
+
+# Classes that can be imported straight from the package, also loaded on first use
+_LAZY_ATTRIBUTES = {
+    "PoorMans1DBarCodeEncoderDecoder_UPC_A": "barcodes.upc",
+    "PoorMans1DBarCodeEncoderDecoder_EAN_13": "barcodes.ean",
+    "PoorMans1DBarCodePageScanner": "barcodes.page",
+    "PoorMans1DBarCodeBatchRenderer": "barcodes.batch",
+    "DecodeBudget": "barcodes.deadline",
+    "DecodeTimeoutError": "barcodes.deadline",
+}
+
+_loaded = {}
+
+
+def register_symbology(name: str, module_name: str, class_name: str):
+    """
+    This function registers (or replaces) a symbology backend without importing it.
+    """
+    SYMBOLOGIES[name] = (module_name, class_name)
+    _loaded.pop(name, None)
+
+
+def get_symbology(name: str) -> type:
+    """
+    This function returns the encoder/decoder class of a symbology, importing its module on first use.
+    """
+    if name not in _loaded:
+        if name not in SYMBOLOGIES:
+            raise KeyError(
+                f"Unknown symbology {name}. Available are {', '.join(SYMBOLOGIES)}")
+        module_name, class_name = SYMBOLOGIES[name]
+        _loaded[name] = getattr(
+            importlib.import_module(module_name), class_name)
+    return _loaded[name]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
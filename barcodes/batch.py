@@ -0,0 +1,203 @@
+"""
+This module renders many UPC-A/EAN-13 barcodes at once straight into a (N, H, W) uint8 numpy array,
+for example to generate synthetic training data without writing and reading back png files.
+"""
+from functools import cached_property
+
+import numpy as np
+
+from . import get_symbology
+
+
+class PoorMans1DBarCodeBatchRenderer:
+    """
+    This class renders batches of barcodes with vectorised gathers from the per digit module patterns
+    of the encoders (left_odd_parities, g_parities, right_even_parities and structure_first_digit).
+    The images look like the ones encode writes: white (255) quiet zones and spaces, black (0) bars.
+    """
+    # Modules of the guards, 1 is a bar
+    GUARD = (1, 0, 1)
+    CENTER = (0, 1, 0, 1, 0)
+    SYMBOL_MODULES = 95
+    # Index of the L, G and R patterns in the pattern table
+    PARITY_CODES = {"L": 0, "G": 1, "R": 2}
+
+    def __init__(self,
+                 symbology="ean-13",
+                 width=309,
+                 height=150,
+                 encoder=None):
+        if symbology not in ("upc-a", "ean-13"):
+            raise ValueError(
+                f"Unknown symbology {symbology}. Use upc-a or ean-13")
+        self.symbology = symbology
+        self.width = width
+        self.height = height
+        # The encoder gives the module patterns and the check digit formula
+        self.encoder = encoder or get_symbology(symbology)()
+        # Digits given per barcode, without the check digit
+        self.digits = 11 if symbology == "upc-a" else 12
+
+    @cached_property
+    def patterns(self) -> np.ndarray:
+        # (3, 10, 7) modules of every digit for the L, G and R parities
+        tables = [self.encoder.left_odd_parities, getattr(self.encoder, "g_parities", None),
+                  self.encoder.right_even_parities]
+        patterns = np.zeros((3, 10, 7), dtype=np.uint8)
+        for parity, table in enumerate(tables):
+            if table:
+                for digit, modules in table.items():
+                    patterns[parity, int(digit)] = [int(x) for x in modules]
+        return patterns
+
+    @cached_property
+    def structures(self) -> np.ndarray:
+        # (10, 12) parity code of every symbol digit for each first digit
+        if self.symbology == "upc-a":
+            structure = {str(digit): "LLLLLLRRRRRR" for digit in range(10)}
+        else:
+            structure = self.encoder.structure_first_digit
+        return np.array([[PoorMans1DBarCodeBatchRenderer.PARITY_CODES[x] for x in structure[str(digit)]]
+                         for digit in range(10)], dtype=np.intp)
+
+    def to_digit_array(self, numbers) -> np.ndarray:
+        """
+        This method turns a list of digit strings (or an integer array) into a (N, digits) integer array.
+        """
+        if isinstance(numbers, np.ndarray):
+            digits = numbers.astype(np.intp)
+        else:
+            # Every number is checked on its own, a long one next to a short one must not even out
+            if any(len(number) != self.digits for number in numbers):
+                raise ValueError(
+                    f"Every {self.symbology} number needs exactly {self.digits} digits")
+            digits = (np.frombuffer("".join(numbers).encode("ascii"), dtype=np.uint8).astype(np.intp) -
+                      ord("0")).reshape(len(numbers), self.digits)
+        if digits.ndim != 2 or digits.shape[1] != self.digits or ((digits < 0) | (digits > 9)).any():
+            raise ValueError(
+                f"Every {self.symbology} number needs exactly {self.digits} digits")
+        return digits
+
+    def check_digits(self, digits: np.ndarray) -> np.ndarray:
+        """
+        This method computes the check digits of a (N, digits) array, the same way compute_checksum does.
+        """
+        if self.symbology == "upc-a":
+            total_sum = digits[:, ::2].sum(axis=1)*3 + \
+                digits[:, 1:-1:2].sum(axis=1)
+        else:
+            total_sum = digits[:, -1:1:-2].sum(axis=1)*3 + \
+                digits[:, -2:1:-2].sum(axis=1)
+        return (10 - total_sum % 10) % 10
+
+    def symbol_modules(self, digits: np.ndarray) -> np.ndarray:
+        """
+        This method returns the (N, 95) modules (1 for a bar) of the symbols, guards included.
+        """
+        count = len(digits)
+        # The 12 digits drawn in the symbol and their parity. For EAN-13 the first digit only picks the parities
+        if self.symbology == "upc-a":
+            drawn = np.concatenate(
+                (digits, self.check_digits(digits)[:, None]), axis=1)
+            parities = np.broadcast_to(self.structures[0], (count, 12))
+        else:
+            drawn = np.concatenate(
+                (digits[:, 1:], self.check_digits(digits)[:, None]), axis=1)
+            parities = self.structures[digits[:, 0]]
+        digit_modules = self.patterns[parities, drawn]  # (N, 12, 7)
+        guard = np.broadcast_to(np.array(
+            PoorMans1DBarCodeBatchRenderer.GUARD, dtype=np.uint8), (count, 3))
+        center = np.broadcast_to(np.array(
+            PoorMans1DBarCodeBatchRenderer.CENTER, dtype=np.uint8), (count, 5))
+        return np.concatenate((guard, digit_modules[:, :6].reshape(count, 42), center,
+                               digit_modules[:, 6:].reshape(count, 42), guard), axis=1)
+
+    def render(self,
+               numbers,
+               module_width=3,
+               left_quiet_zone_width=5,
+               right_quiet_zone_width=3,
+               upper_quiet_zone=10,
+               lower_quiet_zone=10,
+               blur=0,
+               noise=0.0,
+               out: np.ndarray = None,
+               rng: np.random.Generator = None) -> np.ndarray:
+        """
+        This method renders one barcode per number into out, a (N, height, width) uint8 array (allocated when None).
+        module_width (pixels), the quiet zones (modules for left/right, pixel rows for upper/lower),
+        blur (box blur radius in pixels) and noise (standard deviation of gaussian noise) are either
+        one value for all or one value per barcode.
+        """
+        digits = self.to_digit_array(numbers)
+        count = len(digits)
+        if out is None:
+            out = np.empty((count, self.height, self.width), dtype=np.uint8)
+        if out.shape != (count, self.height, self.width) or out.dtype != np.uint8:
+            raise ValueError(
+                f"out must be a uint8 array of shape {(count, self.height, self.width)}")
+
+        def per_sample(value):
+            return np.broadcast_to(np.asarray(value), (count,))
+
+        module_width = per_sample(module_width).astype(np.intp)
+        left = per_sample(left_quiet_zone_width).astype(np.intp)
+        right = per_sample(right_quiet_zone_width).astype(np.intp)
+        upper = per_sample(upper_quiet_zone).astype(np.intp)
+        lower = per_sample(lower_quiet_zone).astype(np.intp)
+        if ((left + PoorMans1DBarCodeBatchRenderer.SYMBOL_MODULES + right)*module_width > self.width).any():
+            raise ValueError(
+                f"Some barcodes are wider than the {self.width} pixels of the images")
+
+        # Module index under every pixel column, gathered from the symbol modules
+        modules = self.symbol_modules(digits)
+        columns = np.arange(self.width)
+        module_index = (columns[None, :] - (left*module_width)
+                        [:, None]) // module_width[:, None]
+        inside = (module_index >= 0) & (
+            module_index < PoorMans1DBarCodeBatchRenderer.SYMBOL_MODULES)
+        bars = np.take_along_axis(modules, np.clip(
+            module_index, 0, PoorMans1DBarCodeBatchRenderer.SYMBOL_MODULES - 1), axis=1)
+        scanlines = np.where(inside & (bars == 1), 0, 255).astype(np.uint8)
+
+        blur = per_sample(blur).astype(np.intp)
+        if blur.any():
+            # Box blur along the scanline from a running sum, the radius can differ per barcode
+            running = np.zeros((count, self.width + 1))
+            np.cumsum(scanlines, axis=1, out=running[:, 1:])
+            low = np.clip(columns[None, :] - blur[:, None], 0, self.width)
+            high = np.clip(columns[None, :] + blur[:, None] + 1, 0, self.width)
+            scanlines = np.rint((np.take_along_axis(running, high, axis=1) -
+                                 np.take_along_axis(running, low, axis=1)) / (high - low)).astype(np.uint8)
+
+        # Every body row is the scanline, the upper and lower quiet zones are white
+        out[...] = scanlines[:, None, :]
+        rows = np.arange(self.height)
+        quiet_rows = (rows[None, :] < upper[:, None]) | (
+            rows[None, :] >= self.height - lower[:, None])
+        out[quiet_rows] = 255
+
+        noise = per_sample(noise).astype(np.float32)
+        if noise.any():
+            rng = rng or np.random.default_rng()
+            # In batches so the float temporaries stay small
+            for start in range(0, count, 256):
+                block = out[start:start + 256]
+                noisy = rng.standard_normal(block.shape, dtype=np.float32)
+                noisy *= noise[start:start + 256, None, None]
+                noisy += block
+                np.clip(noisy, 0, 255, out=noisy)
+                block[...] = np.rint(noisy)
+        return out
+
+
+if __name__ == "__main__":
+    import time
+
+    renderer = PoorMans1DBarCodeBatchRenderer()
+    random_numbers = np.random.default_rng().integers(0, 10, (10000, 12))
+    start = time.perf_counter()
+    images = renderer.render(random_numbers)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Rendered {len(images)} barcodes in {elapsed:.2f}s ({len(images)/elapsed*60:,.0f} per minute)")
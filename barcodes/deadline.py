@@ -0,0 +1,61 @@
+"""
+This module bounds how long a decode may take. The decoders check a DecodeBudget between stages and inside
+their row loops and raise DecodeTimeoutError once the deadline has passed or the decode was cancelled.
+"""
+import time
+
+
+class DecodeTimeoutError(TimeoutError):
+    """
+    This exception is raised when a decode runs past its deadline or is cancelled.
+    stage is where the decode stopped and timings has the seconds spent in every stage up to there.
+    """
+
+    def __init__(self, message: str, stage: str, timings: dict, elapsed: float, cancelled: bool = False):
+        super().__init__(message)
+        self.stage = stage
+        self.timings = timings
+        self.elapsed = elapsed
+        self.cancelled = cancelled
+
+
+class DecodeBudget:
+    """
+    This class holds the deadline (a time.monotonic() value) and the cancellation token of one decode.
+    timeout is in seconds from now; with both timeout and deadline the earlier one wins.
+    cancel is anything with an is_set() method, for example a threading.Event set from another thread.
+    Without any of them the checks never raise but the stage timings are still recorded.
+    """
+
+    def __init__(self, timeout: float = None, deadline: float = None, cancel=None):
+        self.start = time.monotonic()
+        if timeout is not None:
+            deadline = self.start + timeout if deadline is None else min(deadline, self.start + timeout)
+        self.deadline = deadline
+        self.cancel = cancel
+        # Telling png and Netpbm images apart happens in the start stage
+        self.stage = "start"
+        self.stage_start = self.start
+        self.timings = {}
+
+    def check(self):
+        """
+        This method raises DecodeTimeoutError when the deadline has passed or the decode was cancelled.
+        """
+        cancelled = self.cancel is not None and self.cancel.is_set()
+        now = time.monotonic()
+        if cancelled or (self.deadline is not None and now > self.deadline):
+            timings = dict(self.timings)
+            timings[self.stage] = timings.get(self.stage, 0.0) + now - self.stage_start
+            reason = "was cancelled" if cancelled else "timed out"
+            raise DecodeTimeoutError(f"The decode {reason} during {self.stage} after {now - self.start:.3f}s",
+                                     self.stage, timings, now - self.start, cancelled)
+
+    def begin(self, stage: str):
+        """
+        This method checks the budget and starts timing the next stage, ending the current one.
+        """
+        self.check()
+        now = time.monotonic()
+        self.timings[self.stage] = self.timings.get(self.stage, 0.0) + now - self.stage_start
+        self.stage, self.stage_start = stage, now
@@ -0,0 +1,131 @@
+"""
+This module decodes every png (or pgm/pbm) image under directories or globs with the UPC-A/EAN-13 decoders.
+The decoding runs in a process pool and every result is written to stdout as one JSON line.
+
+    python -m barcodes.decode scans/ "labels/**/*.png" --jobs 8 --ordered --offset 1000 --timeout 0.5
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from . import get_symbology
+from .deadline import DecodeTimeoutError
+
+# Symbologies tried (in this order) when decoding with "auto"
+SYMBOLOGIES = ["upc-a", "ean-13"]
+
+# Images picked up when a directory is given
+IMAGE_EXTENSIONS = ("png", "pgm", "pbm")
+
+# One decoder per symbology and worker process
+_decoders = {}
+
+
+def collect_paths(patterns: list[str]) -> list[str]:
+    """
+    This function expands directories (recursively) and globs into a sorted list of image files.
+    The order is stable so that an offset can be used to resume an interrupted run.
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for extension in IMAGE_EXTENSIONS:
+                paths.update(glob.glob(os.path.join(
+                    glob.escape(pattern), "**", f"*.{extension}"), recursive=True))
+        elif os.path.isfile(pattern):
+            paths.add(pattern)
+        else:
+            paths.update(path for path in glob.glob(
+                pattern, recursive=True) if os.path.isfile(path))
+    return sorted(paths)
+
+
+def decode_one(index: int, path: str, symbology: str = "auto", timeout: float = None) -> dict:
+    """
+    This function decodes a single png image and never raises, errors are returned in the result.
+    With "auto" UPC-A is tried first and then EAN-13. timeout (seconds) bounds all the attempts together,
+    a timed out result has the seconds spent in every decode stage under "timings".
+    """
+    start = time.perf_counter()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    result = {"index": index, "path": path, "symbology": None,
+              "digits": None, "check_digit": None, "error": None}
+    candidates = SYMBOLOGIES if symbology == "auto" else [symbology]
+    for name in candidates:
+        if name not in _decoders:
+            _decoders[name] = get_symbology(name)()
+        try:
+            digits = _decoders[name].decode(path, deadline=deadline)
+        except DecodeTimeoutError as error:
+            result.update(error=f"{type(error).__name__}: {error}", timings=error.timings)
+            break
+        except Exception as error:
+            result["error"] = f"{type(error).__name__}: {error}"
+            continue
+        result.update(symbology=name, digits=digits, error=None,
+                      check_digit=_decoders[name].compute_checksum(digits))
+        break
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def decode_all(paths: list[str], symbology: str = "auto", jobs: int = None, ordered: bool = False, offset: int = 0,
+               timeout: float = None):
+    """
+    This generator decodes the paths starting at offset in a process pool and yields every result as soon as it is ready.
+    With ordered the results are yielded in the order of the paths instead.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        indices = iter(range(offset, len(paths)))
+        if ordered:
+            yield from executor.map(decode_one, indices, paths[offset:], [symbology]*(len(paths) - offset),
+                                    [timeout]*(len(paths) - offset), chunksize=16)
+            return
+        # Keep a bounded number of files in flight so that huge runs do not queue everything up front
+        pending = set()
+        for index in indices:
+            pending.add(executor.submit(
+                decode_one, index, paths[index], symbology, timeout))
+            if len(pending) >= 4*jobs:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Decode UPC-A/EAN-13 png images and write one JSON line per image.")
+    parser.add_argument("patterns", nargs="+",
+                        help="Directories, globs or files to decode")
+    parser.add_argument("--symbology", choices=["auto", *SYMBOLOGIES], default="auto",
+                        help="Decoder to use, auto tries UPC-A and then EAN-13")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--ordered", action="store_true",
+                        help="Write the results in path order instead of completion order")
+    parser.add_argument("--offset", type=int, default=0,
+                        help="Skip the first OFFSET files of the sorted list to resume a run")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Give up on a file after TIMEOUT seconds")
+    args = parser.parse_args(argv)
+
+    paths = collect_paths(args.patterns)
+    failures = 0
+    for result in decode_all(paths, args.symbology, args.jobs, args.ordered, args.offset, args.timeout):
+        failures += result["error"] is not None
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
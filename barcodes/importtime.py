@@ -0,0 +1,64 @@
+"""
+This module measures the cold start import time of the package for a png encode/decode and enforces a budget.
+It exits with 1 when the budget is exceeded or when a heavy module (Tk, numpy, ...) gets imported.
+
+    python -m barcodes.importtime --budget-ms 20
+"""
+import argparse
+import compileall
+import os
+import subprocess
+import sys
+
+# Modules a png encode must never pull in
+FORBIDDEN_MODULES = ("tkinter", "turtle", "numpy", "concurrent.futures")
+
+# Run in a fresh interpreter so nothing is imported already
+COLD_START = f"""
+import sys
+import time
+start = time.perf_counter()
+import barcodes
+barcodes.get_symbology("upc-a")
+barcodes.get_symbology("ean-13")
+elapsed = time.perf_counter() - start
+print(elapsed, *[module for module in {FORBIDDEN_MODULES!r} if module in sys.modules])
+"""
+
+
+def measure(repeat: int = 5) -> tuple:
+    """
+    This function returns the best import time in seconds over repeat fresh interpreters
+    and the forbidden modules that were imported.
+    """
+    # Measure what a deployed package costs, not compiling the sources to bytecode
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    compileall.compile_dir(package_dir, quiet=1)
+    timings = []
+    forbidden = set()
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", COLD_START], cwd=os.path.dirname(package_dir),
+                                capture_output=True, text=True, check=True).stdout.split()
+        timings.append(float(output[0]))
+        forbidden.update(output[1:])
+    return min(timings), sorted(forbidden)
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure the cold start import time of the barcodes package.")
+    parser.add_argument("--budget-ms", type=float, default=20.0,
+                        help="Maximum allowed import time in milliseconds")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Number of fresh interpreters to measure, the best is kept")
+    args = parser.parse_args(argv)
+
+    elapsed, forbidden = measure(args.repeat)
+    print(f"Importing barcodes for a png encode took {elapsed*1000:.1f}ms (budget {args.budget_ms:.1f}ms)")
+    if forbidden:
+        print(f"These modules must not be imported: {', '.join(forbidden)}")
+    return 1 if elapsed*1000 > args.budget_ms or forbidden else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+This module finds and decodes all the UPC-A/EAN-13 barcodes on a large scanned page.
+The page is streamed in row windows so memory is bounded by the window size, not by the page size.
+"""
+import numpy as np
+
+from .upc import PoorMans1DBarCodeEncoderDecoder_UPC_A
+from .ean import PoorMans1DBarCodeEncoderDecoder_EAN_13
+
+
+class PoorMans1DBarCodePageScanner:
+    """
+    This class locates horizontal UPC-A/EAN-13 symbols in a png page by their guard pattern run lengths
+    and returns every symbol with its bounding box.
+    """
+    # A symbol is 59 runs: guard (3), 6 digits (4 each), center (5), 6 digits (4 each), guard (3)
+    SYMBOL_RUNS = 59
+    SYMBOL_MODULES = 95
+    # Offsets (in runs from the first bar) of the single module guard runs
+    GUARD_RUNS = (0, 1, 2, 27, 28, 29, 30, 31, 56, 57, 58)
+    LEFT_DIGIT_RUNS = tuple(range(3, 27, 4))
+    RIGHT_DIGIT_RUNS = tuple(range(32, 56, 4))
+
+    def __init__(self,
+                 window_rows=256,
+                 row_step=2,
+                 quiet_zone_modules=3,
+                 min_contrast=64,
+                 min_rows=3,
+                 upc_a=None,
+                 ean_13=None):
+        self.window_rows = window_rows
+        self.row_step = row_step  # Scan every row_step-th row
+        self.quiet_zone_modules = quiet_zone_modules
+        self.min_contrast = min_contrast  # Rows with less contrast than this are skipped
+        self.min_rows = min_rows  # A symbol has to be read on this many scanned rows
+        self.upc_a = upc_a or PoorMans1DBarCodeEncoderDecoder_UPC_A()
+        self.ean_13 = ean_13 or PoorMans1DBarCodeEncoderDecoder_EAN_13()
+
+    def find_candidates(self, row: np.ndarray) -> tuple:
+        """
+        This method returns the run lengths of a scanline and the indices of the runs where a symbol may start.
+        A candidate is a bar after a wide enough quiet zone whose guard runs are all about one module wide.
+        """
+        low, high = int(row.min()), int(row.max())
+        if high - low < self.min_contrast:
+            return None, np.empty(0, dtype=np.intp)
+        dark = row < (low + high)//2
+        starts = np.concatenate(
+            ([0], np.flatnonzero(dark[1:] != dark[:-1]) + 1))
+        lengths = np.diff(np.append(starts, len(row)))
+        # Candidates need a quiet zone run before and after the symbol
+        candidates = np.arange(
+            1, len(lengths) - PoorMans1DBarCodePageScanner.SYMBOL_RUNS)
+        candidates = candidates[dark[starts[candidates]]]
+        if not len(candidates):
+            return lengths, candidates
+        run_ends = np.concatenate(([0], np.cumsum(lengths)))
+        module = (run_ends[candidates + PoorMans1DBarCodePageScanner.SYMBOL_RUNS] -
+                  run_ends[candidates]) / PoorMans1DBarCodePageScanner.SYMBOL_MODULES
+        keep = (module >= 1) & \
+            (lengths[candidates - 1] >= self.quiet_zone_modules*module) & \
+            (lengths[candidates + PoorMans1DBarCodePageScanner.SYMBOL_RUNS]
+             >= self.quiet_zone_modules*module)
+        for offset in PoorMans1DBarCodePageScanner.GUARD_RUNS:
+            keep &= np.abs(lengths[candidates + offset] - module) < 0.5*module
+        return lengths, candidates[keep]
+
+    def read_digit(self, runs: np.ndarray, starts_with_bar: bool) -> str:
+        """
+        This method turns the 4 runs of one digit into its 7 module pattern, None if they do not add up to 7 modules.
+        """
+        modules = np.rint(runs*7/runs.sum()).astype(int)
+        if modules.sum() != 7 or (modules == 0).any():
+            return None
+        bits = "10" if starts_with_bar else "01"
+        return "".join(bits[i % 2]*count for i, count in enumerate(modules))
+
+    def decode_candidate(self, lengths: np.ndarray, start: int) -> tuple:
+        """
+        This method decodes the symbol starting at run index start and returns (symbology, digits, check digit).
+        Symbols whose left half is all L parity are UPC-A, the others EAN-13 (same as the single image decoders).
+        None is returned when a digit or the check digit does not match.
+        """
+        reverse_left_odd_parities = self.ean_13.reverse_left_odd_parities
+        reverse_g_parities = self.ean_13.reverse_g_parities
+        reverse_right_even_parities = self.ean_13.reverse_right_even_parities
+        digits = ""
+        parities = ""
+        for offset in PoorMans1DBarCodePageScanner.LEFT_DIGIT_RUNS:
+            pattern = self.read_digit(
+                lengths[start + offset:start + offset + 4], False)
+            if pattern in reverse_left_odd_parities:
+                digits += reverse_left_odd_parities[pattern]
+                parities += "L"
+            elif pattern in reverse_g_parities:
+                digits += reverse_g_parities[pattern]
+                parities += "G"
+            else:
+                return None
+        for offset in PoorMans1DBarCodePageScanner.RIGHT_DIGIT_RUNS:
+            pattern = self.read_digit(
+                lengths[start + offset:start + offset + 4], True)
+            if pattern not in reverse_right_even_parities:
+                return None
+            digits += reverse_right_even_parities[pattern]
+        digits, check_digit = digits[:-1], int(digits[-1])
+        if parities == "LLLLLL":
+            symbology, decoder = "upc-a", self.upc_a
+        else:
+            reverse_structure_first_digit = self.ean_13.reverse_structure_first_digit
+            if parities not in reverse_structure_first_digit:
+                return None
+            symbology, decoder = "ean-13", self.ean_13
+            digits = reverse_structure_first_digit[parities] + digits
+        if decoder.compute_checksum(digits) != check_digit:
+            return None
+        return symbology, digits, check_digit
+
+    def scan_row(self, row: np.ndarray) -> list[tuple]:
+        """
+        This method returns (left, right, symbology, digits, check digit) for every symbol read on a scanline.
+        """
+        lengths, candidates = self.find_candidates(row)
+        found = []
+        if not len(candidates):
+            return found
+        run_ends = np.concatenate(([0], np.cumsum(lengths)))
+        for start in candidates:
+            decoded = self.decode_candidate(lengths, start)
+            if decoded:
+                found.append((int(run_ends[start]), int(
+                    run_ends[start + PoorMans1DBarCodePageScanner.SYMBOL_RUNS]) - 1, *decoded))
+        return found
+
+    def scan(self, png_image_to_read: str, verbose: bool = False) -> list[dict]:
+        """
+        This method returns every symbol on the page as a dict with symbology, digits, check digit
+        and bounding box (left, top, right, bottom), sorted top to bottom and left to right.
+        Reads of the same symbol on nearby scanlines are merged into one region.
+        """
+        max_gap = 2*self.row_step
+        open_regions = []
+        symbols = []
+
+        def close(region):
+            if region["rows"] >= self.min_rows:
+                symbols.append({key: region[key] for key in (
+                    "symbology", "digits", "check_digit", "bbox")})
+
+        for row_offset, window in self.upc_a.iter_png_windows(png_image_to_read, self.window_rows, verbose):
+            first = (-row_offset) % self.row_step
+            for y in range(row_offset + first, row_offset + len(window), self.row_step):
+                for left, right, symbology, digits, check_digit in self.scan_row(window[y - row_offset]):
+                    for region in open_regions:
+                        region_left, top, region_right, bottom = region["bbox"]
+                        if region["digits"] == digits and region["symbology"] == symbology and \
+                                left <= region_right and right >= region_left:
+                            region["bbox"] = (min(left, region_left), top,
+                                              max(right, region_right), y)
+                            region["rows"] += 1
+                            break
+                    else:
+                        open_regions.append({"symbology": symbology, "digits": digits, "check_digit": check_digit,
+                                             "bbox": (left, y, right, y), "rows": 1})
+                # Regions not seen for a while are complete
+                still_open = []
+                for region in open_regions:
+                    if y - region["bbox"][3] > max_gap:
+                        close(region)
+                    else:
+                        still_open.append(region)
+                open_regions = still_open
+        for region in open_regions:
+            close(region)
+        symbols.sort(key=lambda symbol: (symbol["bbox"][1], symbol["bbox"][0]))
+        if verbose:
+            for symbol in symbols:
+                print(
+                    f"Found {symbol['symbology']} {symbol['digits']}-{symbol['check_digit']} at {symbol['bbox']}")
+        return symbols
+
+
+if __name__ == "__main__":
+    import sys
+
+    for symbol in PoorMans1DBarCodePageScanner().scan(sys.argv[1]):
+        print(symbol)
@@ -0,0 +1,5 @@
+"""
+This module is the placeholder for QR code encoding and decoding. Nothing is implemented yet, so it is not
+registered as a symbology; an implementation registers itself with barcodes.register_symbology("qr", ...).
+https://en.wikipedia.org/wiki/QR_code
+"""
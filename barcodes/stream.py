@@ -0,0 +1,248 @@
+"""
+This module decodes a continuous stream of concatenated png images (a pipe, stdin or a socket) without temporary files.
+Bytes are pushed in pieces of any size and every image is decoded as soon as its IEND block arrives.
+
+    capture_frames | python -m barcodes.stream --symbology ean-13
+"""
+import argparse
+import io
+import json
+import struct
+import sys
+import zlib
+
+from . import get_symbology
+from .upc import PoorMans1DBarCodeEncoderDecoder_UPC_A
+
+
+class PoorMans1DBarCodeStreamDecoder:
+    """
+    This class is a push based png state machine (signature -> chunks -> IEND) that inflates IDAT data as it arrives.
+    Only partial chunk heads/CRCs, the inflated rows and the raw bytes of the current image are buffered.
+    The raw bytes are kept so that after an error the next png signature is looked for inside them as well,
+    a truncated image must not take the image following it down too.
+    """
+    # States of the state machine
+    SIGNATURE, CHUNK_HEAD, CHUNK_DATA, CHUNK_CRC, RESYNC = range(5)
+    # Largest chunk length the png specification allows
+    MAX_CHUNK_LENGTH = (1 << 31) - 1
+
+    def __init__(self, symbologies=("upc-a", "ean-13"), verbose=False):
+        # Decoders tried (in this order) on every image
+        self.decoders = [(name, get_symbology(name)()) for name in symbologies]
+        self.verbose = verbose
+        self.frames = 0
+        self.start_frame()
+
+    def start_frame(self):
+        """
+        This method forgets the current image and waits for the next png signature.
+        """
+        self.state = PoorMans1DBarCodeStreamDecoder.SIGNATURE
+        self.buffer = bytearray()
+        # Raw bytes of the current image from its signature on
+        self.frame_bytes = bytearray()
+        self.header = None
+        self.chunk_type = None
+        self.chunk_remaining = 0
+        self.chunk_checksum = 0
+        self.decompressor = zlib.decompressobj()
+        self.inflated = bytearray()
+        self.inflated_needed = 0
+        # IDAT bytes seen so far and the most a (even uncompressed) image of the IHDR size can need
+        self.idat_length = 0
+        self.idat_limit = 0
+
+    def frame_result(self, **kwargs) -> dict:
+        result = {"frame": self.frames, "symbology": None,
+                  "digits": None, "check_digit": None, "error": None}
+        result.update(kwargs)
+        self.frames += 1
+        return result
+
+    def feed(self, data: bytes) -> list[dict]:
+        """
+        This method pushes the next bytes of the stream and returns the results of the images completed by them.
+        A broken image gives a result with an error and the decoder looks for the next png signature.
+        """
+        results = []
+        view = memoryview(data)
+        position = 0
+        while position < len(view):
+            try:
+                if self.state == PoorMans1DBarCodeStreamDecoder.RESYNC:
+                    self.buffer += view[position:]
+                    position = len(view)
+                    index = self.buffer.find(
+                        PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_SIGNATURE)
+                    if index < 0:
+                        # Keep what could be the start of a signature split across pieces
+                        del self.buffer[:-7]
+                        continue
+                    view = memoryview(bytes(self.buffer[index:]))
+                    position = 0
+                    self.start_frame()
+                elif self.state == PoorMans1DBarCodeStreamDecoder.CHUNK_DATA:
+                    take = min(self.chunk_remaining, len(view) - position)
+                    self.frame_bytes += view[position:position + take]
+                    position += take
+                    self.consume_chunk_data(view[position - take:position])
+                else:
+                    # Signature, chunk head and CRC have a fixed size, gather them first
+                    size = 8 if self.state != PoorMans1DBarCodeStreamDecoder.CHUNK_CRC else 4
+                    take = min(size - len(self.buffer), len(view) - position)
+                    self.buffer += view[position:position + take]
+                    self.frame_bytes += view[position:position + take]
+                    position += take
+                    if len(self.buffer) == size:
+                        result = self.consume_buffer()
+                        if result:
+                            results.append(result)
+            except (TypeError, ValueError, struct.error, zlib.error) as error:
+                if self.verbose:
+                    print(f"Frame {self.frames} is broken: {error}")
+                results.append(self.frame_result(
+                    error=f"{type(error).__name__}: {error}"))
+                # The next image may have started inside the bytes this one took, look there first
+                view = memoryview(bytes(self.frame_bytes[1:]) + bytes(view[position:]))
+                position = 0
+                self.start_frame()
+                self.state = PoorMans1DBarCodeStreamDecoder.RESYNC
+        return results
+
+    def consume_buffer(self) -> dict:
+        """
+        This method handles a complete signature, chunk head or chunk CRC and returns a result when an image is complete.
+        """
+        if self.state == PoorMans1DBarCodeStreamDecoder.SIGNATURE:
+            if self.buffer != PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_SIGNATURE:
+                raise TypeError("This is not a png file!")
+            self.state = PoorMans1DBarCodeStreamDecoder.CHUNK_HEAD
+        elif self.state == PoorMans1DBarCodeStreamDecoder.CHUNK_HEAD:
+            self.chunk_remaining = struct.unpack("!I", self.buffer[:4])[0]
+            self.chunk_type = struct.unpack("!4B", self.buffer[4:])
+            # A corrupted length must not make us wait for gigabytes of chunk data that never come
+            if self.chunk_remaining > PoorMans1DBarCodeStreamDecoder.MAX_CHUNK_LENGTH:
+                raise TypeError(
+                    f"The chunk length {self.chunk_remaining} is larger than png allows!")
+            if (self.header is None) != (self.chunk_type == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IHDR):
+                raise TypeError("This is not an IHDR block!")
+            self.decoders[0][1].check_png_chunk_type(self.chunk_type)
+            if self.chunk_type == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IHDR and self.chunk_remaining != 13:
+                raise TypeError("The IHDR block must be 13 bytes long!")
+            if self.chunk_type == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IDAT:
+                self.idat_length += self.chunk_remaining
+                if self.idat_length > self.idat_limit:
+                    raise TypeError(
+                        f"The IDAT data ({self.idat_length} bytes) is far larger than the image can need!")
+            if self.chunk_type == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IHDR:
+                # The IHDR data is kept so that read_png_header can check it
+                self.header = bytes(self.buffer)
+            self.chunk_checksum = zlib.crc32(self.buffer[4:])
+            self.state = PoorMans1DBarCodeStreamDecoder.CHUNK_DATA if self.chunk_remaining else \
+                PoorMans1DBarCodeStreamDecoder.CHUNK_CRC
+        else:
+            saved_checksum = struct.unpack("!I", self.buffer)[0]
+            if saved_checksum != self.chunk_checksum:
+                raise TypeError("Checksum failed!")
+            self.state = PoorMans1DBarCodeStreamDecoder.CHUNK_HEAD
+            if self.chunk_type == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IHDR:
+                self.header = self.decoders[0][1].read_png_header(io.BytesIO(
+                    PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_SIGNATURE + self.header + self.buffer))
+                height, stride = self.header[1], self.header[4]
+                rows_needed = max(
+                    0, height - min(decoder.lower_quiet_zone for _, decoder in self.decoders))
+                self.inflated_needed = self.decoders[0][1].check_inflated_size(
+                    rows_needed*(stride+1))
+                # Stored deflate blocks add 5 bytes per 64K, twice the raw image size is already absurd
+                self.idat_limit = 2*height*(stride+1) + (1 << 16)
+            elif self.chunk_type == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IEND:
+                return self.finish_frame()
+        self.buffer.clear()
+        return None
+
+    def consume_chunk_data(self, piece: memoryview):
+        """
+        This method checksums chunk data as it arrives and inflates IDAT data until the needed rows are there.
+        """
+        self.chunk_checksum = zlib.crc32(piece, self.chunk_checksum)
+        self.chunk_remaining -= len(piece)
+        if self.chunk_type == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IHDR:
+            if len(self.header) + len(piece) > 8 + 13:
+                raise TypeError("The IHDR block is too long!")
+            self.header += piece
+        elif self.chunk_type == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IDAT and \
+                len(self.inflated) < self.inflated_needed:
+            # The rows below the ones we look at are never inflated
+            self.inflated += self.decompressor.decompress(
+                piece, self.inflated_needed - len(self.inflated))
+        if not self.chunk_remaining:
+            self.state = PoorMans1DBarCodeStreamDecoder.CHUNK_CRC
+
+    def finish_frame(self) -> dict:
+        """
+        This method decodes the completed image with every decoder in turn and starts the next image.
+        """
+        header, inflated, inflated_needed = self.header, self.inflated, self.inflated_needed
+        self.start_frame()
+        if len(inflated) < inflated_needed or not inflated:
+            raise TypeError("The image data is shorter than the IHDR claims!")
+        height, stride = header[1], header[4]
+        scanlines = self.decoders[0][1].inflated_to_scanlines(
+            inflated, header, len(inflated)//(stride+1))
+        result = None
+        for name, decoder in self.decoders:
+            try:
+                digits = decoder.decode_scanlines(
+                    scanlines[:height - decoder.lower_quiet_zone], self.verbose)
+            except Exception as error:
+                result = f"{type(error).__name__}: {error}"
+                continue
+            return self.frame_result(symbology=name, digits=digits, check_digit=decoder.compute_checksum(digits))
+        return self.frame_result(error=result)
+
+    def close(self) -> list[dict]:
+        """
+        This method ends the stream and returns an error result when it stopped in the middle of an image.
+        """
+        results = []
+        if self.state == PoorMans1DBarCodeStreamDecoder.SIGNATURE:
+            incomplete = bool(self.buffer)
+        else:
+            incomplete = self.state != PoorMans1DBarCodeStreamDecoder.RESYNC
+        if incomplete:
+            results.append(self.frame_result(
+                error="TypeError: The stream ended in the middle of an image!"))
+        self.start_frame()
+        return results
+
+    def decode_stream(self, stream, chunk_size: int = 1 << 16):
+        """
+        This generator reads a binary stream (sys.stdin.buffer, a pipe, socket.makefile("rb"), ...)
+        and yields a result for every image as soon as it is complete.
+        Nothing is read ahead of what the consumer asks for.
+        """
+        # read1 returns what is available instead of waiting for a full chunk_size
+        read = getattr(stream, "read1", stream.read)
+        while data := read(chunk_size):
+            yield from self.feed(data)
+        yield from self.close()
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Decode a stream of concatenated png images from stdin and write one JSON line per image.")
+    parser.add_argument("--symbology", choices=["auto", "upc-a", "ean-13"], default="auto",
+                        help="Decoder to use, auto tries UPC-A and then EAN-13")
+    args = parser.parse_args(argv)
+
+    symbologies = ("upc-a", "ean-13") if args.symbology == "auto" else (args.symbology,)
+    decoder = PoorMans1DBarCodeStreamDecoder(symbologies)
+    for result in decoder.decode_stream(sys.stdin.buffer):
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1016 @@
+"""
+This module encodes and decodes barcodes as per UPC-A standards
+https://en.wikipedia.org/wiki/Universal_Product_Code
+"""
+from __future__ import annotations
+
+import contextlib
+import mmap
+import os
+import zlib
+import struct
+from collections import OrderedDict
+from functools import cached_property
+
+from .deadline import DecodeBudget
+
+
+class PoorMans1DBarCodeEncoderDecoder_UPC_A:
+    """
+    This class implements the UPC-A class of 2D barcode encoding and decoding via eps image.
+    """
+    PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+    PNG_IEND = tuple(map(lambda x: int.from_bytes(
+        x, "big"), (b"\x49", b"\x45", b"\x4E", b"\x44")),)  # corresponds to b"IEND"
+    PNG_IHDR = tuple(map(lambda x: int.from_bytes(
+        x, "big"), (b"\x49", b"\x48", b"\x44", b"\x52")),)  # corresponds to b"IHDR"
+    PNG_IDAT = tuple(map(lambda x: int.from_bytes(
+        x, "big"), (b"\x49", b"\x44", b"\x41", b"\x54")),)  # corresponds to b"IDAT"
+    PNG_PLTE = tuple(map(lambda x: int.from_bytes(
+        x, "big"), (b"\x50", b"\x4C", b"\x54", b"\x45")),)  # corresponds to b"PLTE"
+    # Deflate settings (level, window bits, memory level, strategy) tried when optimising the png size
+    PNG_DEFLATE_HEURISTIC = [(9, 15, 9, strategy)
+                             for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED, zlib.Z_RLE)]
+    PNG_DEFLATE_BRUTE_FORCE = [(level, window_bits, memory_level, strategy)
+                               for level in (6, 9)
+                               for window_bits in (12, 15)
+                               for memory_level in (8, 9)
+                               for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED,
+                                                zlib.Z_HUFFMAN_ONLY, zlib.Z_RLE)]
+    # Binary greyscale (P5) and packed bitmap (P4) Netpbm images, uncompressed for local pipelines
+    NETPBM_MAGICS = (b"P5", b"P4")
+    # Uncompressed bytes per block when deflating in parallel
+    PARALLEL_DEFLATE_BLOCK_BYTES = 1 << 17
+    # Samples per pixel and the allowed bit depths for every supported colour type
+    PNG_CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+    PNG_BIT_DEPTHS = {0: (1, 2, 4, 8, 16), 2: (8, 16), 4: (8, 16), 6: (8, 16)}
+
+    def __init__(self,
+                 width=3,
+                 height=150,
+                 upper_quiet_zone=10,
+                 lower_quiet_zone=10,
+                 left_quiet_zone_width=5,
+                 right_quiet_zone_width=3,
+                 left_odd_parities={
+                     '0': '0001101', '1': '0011001', '2': '0010011', '3': '0111101', '4': '0100011',
+                     '5': '0110001', '6': '0101111', '7': '0111011', '8': '0110111', '9': '0001011'},
+                 right_even_parities={
+                     '0': '1110010', '1': '1100110', '2': '1101100', '3': '1000010', '4': '1011100',
+                     '5': '1001110', '6': '1010000', '7': '1000100', '8': '1001000', '9': '1110100'},
+                 png_optimization=None,
+                 decode_cache_size=0,
+                 deflate_threads=1,
+                 max_inflate_bytes=1 << 28):
+        self.width = width
+        self.height = height
+        self.upper_quiet_zone = upper_quiet_zone
+        self.lower_quiet_zone = lower_quiet_zone
+        self.left_quiet_zone_width = left_quiet_zone_width
+        self.right_quiet_zone_width = right_quiet_zone_width
+        self.left_odd_parities = left_odd_parities
+        self.right_even_parities = right_even_parities
+        # None writes filter type 0 with default deflate, "heuristic" picks a filter per row and
+        # "brute_force" additionally tries every filter strategy, keeping the smallest output
+        self.png_optimization = png_optimization
+        # Number of decode results kept, keyed on the IHDR and IDAT CRCs. 0 disables the cache
+        self.decode_cache_size = decode_cache_size
+        self.decode_cache = OrderedDict()
+        # More than 1 deflates large images in blocks on that many threads, written as several IDAT chunks
+        self.deflate_threads = deflate_threads
+        # Largest amount of image data a decode inflates, larger images are refused (decompression bombs)
+        self.max_inflate_bytes = max_inflate_bytes
+
+    # The reverse lookup tables are built on first use and cached per instance
+    @cached_property
+    def reverse_left_odd_parities(self) -> dict:
+        return {v: k for k, v in self.left_odd_parities.items()}
+
+    @cached_property
+    def reverse_right_even_parities(self) -> dict:
+        return {v: k for k, v in self.right_even_parities.items()}
+
+    def create_ihdr(self,
+                    color_type: int = 0,
+                    bit_depth: int = 8,
+                    compression: int = 0,
+                    filter_method: int = 0,
+                    interlace_method: int = 0,
+                    **kwargs) -> bytes:
+        # Create the png header
+        # First pack the Length
+        head = struct.pack(
+            "!BBBB", *tuple(map(lambda x: int.from_bytes(x, "big"), (b"\x00", b"\x00", b"\x00", b"\x0D")),))
+        # Pack the type
+        block = struct.pack(
+            "!BBBB", *PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IHDR)
+        # Now pack the Data
+        # Width calculations
+        total_width = kwargs.get("barcode_width") or self.width
+        # Header packing (The sequence must be honored)
+        # Width -> Height -> BitDepth -> ColorSpace -> Compression-> Filter_Method -> Interlacing method
+        block += struct.pack(
+            "!I", total_width)
+        block += struct.pack(
+            "!I", self.height)
+        block += struct.pack(
+            "!B", bit_depth)
+        block += struct.pack(
+            "!B", color_type)
+        block += struct.pack(
+            "!B", compression)
+        block += struct.pack(
+            "!B", filter_method)
+        block += struct.pack(
+            "!B", interlace_method)
+        crc_block = struct.pack("!I", zlib.crc32(block))
+        return head + block + crc_block
+
+    def create_iend(self) -> bytes:
+        # Create IEND
+        # First pack the Length
+        head = struct.pack(
+            "!BBBB", *tuple(map(lambda x: int.from_bytes(x, "big"), (b"\x00", b"\x00", b"\x00", b"\x00")),))
+        # Pack the type
+        block = struct.pack(
+            "!BBBB", *PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IEND)
+        crc_block = struct.pack("!I", zlib.crc32(block))
+        return head + block + crc_block
+
+    def filter_scanlines(self, image: np.ndarray, bytes_per_pixel: int = 1) -> np.ndarray:
+        """
+        This method applies all five png filters to every row and returns a (5, rows, stride) uint8 array.
+        The predictors only look at unfiltered bytes so every filter is computed for the whole image at once.
+        """
+        import numpy as np
+        current = image.astype(np.int16)
+        left = np.zeros_like(current)
+        left[:, bytes_per_pixel:] = current[:, :-bytes_per_pixel]
+        above = np.zeros_like(current)
+        above[1:] = current[:-1]
+        upper_left = np.zeros_like(current)
+        upper_left[:, bytes_per_pixel:] = above[:, :-bytes_per_pixel]
+        p = left + above - upper_left
+        pa, pb, pc = np.abs(p - left), np.abs(p - above), np.abs(p - upper_left)
+        paeth = np.where((pa <= pb) & (pa <= pc), left,
+                         np.where(pb <= pc, above, upper_left))
+        predictors = [0, left, above, (left + above) >> 1, paeth]
+        return np.stack([(current - predictor) & 0xFF for predictor in predictors]).astype(np.uint8)
+
+    def compress_optimized(self, data: list[list[int]]) -> bytes:
+        """
+        This method deflates the image with several filter choices and deflate settings and returns the smallest stream.
+        The candidates are compressed in a thread pool since zlib releases the GIL while deflating.
+        """
+        if self.png_optimization not in ("heuristic", "brute_force"):
+            raise ValueError(
+                f"Unknown png optimization {self.png_optimization}. Use None, 'heuristic' or 'brute_force'")
+        # numpy and the thread pool are only imported when optimising
+        from concurrent.futures import ThreadPoolExecutor
+        import numpy as np
+
+        image = np.array(data, dtype=np.uint8)
+        filtered = self.filter_scanlines(image)
+        rows = np.arange(image.shape[0])
+        # Per row heuristic: minimum sum of absolute differences with bytes seen as signed (as libpng does)
+        row_costs = np.abs(filtered.view(np.int8).astype(np.int32)).sum(axis=2)
+        filter_choices = [np.argmin(row_costs, axis=0)]
+        deflate_settings = PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_DEFLATE_HEURISTIC
+        if self.png_optimization == "brute_force":
+            # Also try the same filter on every row, for barcodes Up makes every body row zeros
+            filter_choices += [np.full(image.shape[0], filter_type)
+                               for filter_type in range(5)]
+            deflate_settings = PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_DEFLATE_BRUTE_FORCE
+        raw_candidates = []
+        for choice in filter_choices:
+            raw = np.empty((image.shape[0], image.shape[1] + 1), dtype=np.uint8)
+            raw[:, 0] = choice
+            raw[:, 1:] = filtered[choice, rows]
+            raw_candidates.append(raw.tobytes())
+
+        def deflate(raw, level, window_bits, memory_level, strategy):
+            compressor = zlib.compressobj(
+                level, zlib.DEFLATED, window_bits, memory_level, strategy)
+            return compressor.compress(raw) + compressor.flush()
+
+        with ThreadPoolExecutor() as executor:
+            futures = [executor.submit(deflate, raw, *settings)
+                       for raw in raw_candidates for settings in deflate_settings]
+            candidates = [future.result() for future in futures]
+        return min(candidates, key=len)
+
+    def compress_parallel(self, raw: bytes, row_bytes: int) -> list[bytes]:
+        """
+        This method deflates blocks of scanlines concurrently (like pigz) and returns the pieces of one zlib stream.
+        Every block is primed with the 32K before it and ends on a sync flush so the pieces simply join up.
+        The zlib header is in the first piece and the adler32 of all the data in the last one.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        level = 6
+        # Whole scanlines per block
+        block_size = max(1, PoorMans1DBarCodeEncoderDecoder_UPC_A.PARALLEL_DEFLATE_BLOCK_BYTES //
+                         row_bytes)*row_bytes
+        starts = range(0, len(raw), block_size)
+
+        def deflate(start):
+            dictionary = raw[max(0, start - 32768):start]
+            if dictionary:
+                compressor = zlib.compressobj(
+                    level, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, dictionary)
+            else:
+                compressor = zlib.compressobj(level, zlib.DEFLATED, -15, 9)
+            compressed = compressor.compress(raw[start:start + block_size])
+            last = start + block_size >= len(raw)
+            return compressed + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+        # zlib releases the GIL while deflating so threads run the blocks in parallel
+        with ThreadPoolExecutor(max_workers=self.deflate_threads) as executor:
+            pieces = list(executor.map(deflate, starts))
+        # zlib header: deflate with a 32K window, default level, FCHECK making it a multiple of 31
+        header = 0x7800 | (2 << 6)
+        header |= 31 - header % 31
+        pieces[0] = struct.pack("!H", header) + pieces[0]
+        pieces[-1] += struct.pack("!I", zlib.adler32(raw))
+        return pieces
+
+    def create_idat_chunk(self, compressed: bytes) -> bytes:
+        # Create IDAT chunk
+        block = struct.pack(
+            "!BBBB", *PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IDAT)
+        # Now write length
+        length_block = struct.pack("!I", len(compressed))
+        block += compressed
+        crc_block = struct.pack("!I", zlib.crc32(block))
+        return length_block + block + crc_block
+
+    def create_idat(self, data: list[list[bytes]]) -> bytes:
+        # Create IDAT chunk(s)
+        if self.png_optimization:
+            return self.create_idat_chunk(self.compress_optimized(data))
+        # Go through data, every row starts with filter type 0
+        # See https://stackoverflow.com/questions/8554282/creating-a-png-file-in-python
+        # bytes() ensures every column is at max 255
+        raw = b"".join(b"\0" + bytes(row) for row in data)
+        if self.deflate_threads > 1 and len(raw) > PoorMans1DBarCodeEncoderDecoder_UPC_A.PARALLEL_DEFLATE_BLOCK_BYTES:
+            # One IDAT chunk per compressed block
+            return b"".join(map(self.create_idat_chunk, self.compress_parallel(raw, len(raw)//len(data))))
+        # compress
+        compressor = zlib.compressobj()
+        compressed = compressor.compress(raw)
+        compressed += compressor.flush()
+        return self.create_idat_chunk(compressed)
+
+    def create_png_file(self, data: list[bytes], **kwargs) -> bytes:
+        # Create the png signature first
+        png_returned = PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_SIGNATURE
+        # Create header (IHDR)
+        png_returned += self.create_ihdr(**kwargs)
+        # Create data (IDAT)
+        png_returned += self.create_idat(data)
+        # Create end block (IEND)
+        png_returned += self.create_iend()
+        return png_returned
+
+    def create_pgm_file(self, data: list[list[int]], **kwargs) -> bytes:
+        """
+        This method creates a binary greyscale Netpbm (P5) image, a text header followed by the raw rows.
+        See https://netpbm.sourceforge.net/doc/pgm.html
+        """
+        header = f"P5\n{len(data[0])} {len(data)}\n255\n".encode("ascii")
+        return header + b"".join(bytes(row) for row in data)
+
+    def create_pbm_file(self, data: list[list[int]], **kwargs) -> bytes:
+        """
+        This method creates a packed bitmap Netpbm (P4) image, 8 pixels per byte with 1 for black.
+        See https://netpbm.sourceforge.net/doc/pbm.html
+        """
+        width = len(data[0])
+        header = f"P4\n{width} {len(data)}\n".encode("ascii")
+        packed_rows = {}
+        body = []
+        for row in data:
+            row = bytes(row)
+            # Barcode rows repeat, so pack every distinct row once
+            if row not in packed_rows:
+                bits = "".join("1" if x < 128 else "0" for x in row)
+                bits = bits.ljust((width + 7)//8*8, "0")
+                packed_rows[row] = int(bits, 2).to_bytes(len(bits)//8, "big")
+            body.append(packed_rows[row])
+        return header + b"".join(body)
+
+    def create_image_file(self, data: list[list[int]], image_format: str = "png", **kwargs) -> bytes:
+        """
+        This method creates the image bytes in the given format: png, pgm (Netpbm P5) or pbm (Netpbm P4).
+        """
+        creators = {"png": self.create_png_file,
+                    "pgm": self.create_pgm_file,
+                    "pbm": self.create_pbm_file}
+        if image_format not in creators:
+            raise ValueError(
+                f"Unknown image format {image_format}. Use one of {', '.join(creators)}")
+        return creators[image_format](data, **kwargs)
+
+    @cached_property
+    def pbm_byte_table(self) -> list[bytes]:
+        # The 8 luminance pixels of every packed bitmap byte, most significant bit first
+        return [bytes(0 if value >> (7 - bit) & 1 else 255 for bit in range(8)) for value in range(256)]
+
+    def open_image(self, image_to_read):
+        """
+        This method opens an image path for reading. An already open binary file is used as it is, from its start,
+        and left open, so that one decode opens the file only once.
+        """
+        if hasattr(image_to_read, "read"):
+            image_to_read.seek(0)
+            return contextlib.nullcontext(image_to_read)
+        return open(image_to_read, "rb")
+
+    def is_netpbm_file(self, image_to_read: str) -> bool:
+        """
+        This method tells Netpbm (P5/P4) images apart from png images by their magic number.
+        """
+        with self.open_image(image_to_read) as filehandle:
+            return filehandle.read(2) in PoorMans1DBarCodeEncoderDecoder_UPC_A.NETPBM_MAGICS
+
+    def read_netpbm_scanlines(self, image_to_read: str, verbose: bool = False,
+                              budget: DecodeBudget = None) -> list[bytes]:
+        """
+        This method memory maps a Netpbm (P5/P4) image and returns its scanlines as 8 bit luminance rows.
+        Every row is read directly at its offset and only the rows above the lower quiet zone are read.
+        """
+        budget = budget or DecodeBudget()
+        budget.begin("read")
+        with self.open_image(image_to_read) as filehandle:
+            if not os.fstat(filehandle.fileno()).st_size:
+                raise TypeError("This is not a netpbm file!")
+            with mmap.mmap(filehandle.fileno(), 0, access=mmap.ACCESS_READ) as image:
+                magic = image[:2]
+                if magic not in PoorMans1DBarCodeEncoderDecoder_UPC_A.NETPBM_MAGICS:
+                    if verbose:
+                        print("This is not a netpbm file!")
+                    raise TypeError("This is not a netpbm file!")
+                # Header fields are separated by whitespace and may have # comments in between
+                fields = []
+                position = 2
+                while len(fields) < (3 if magic == b"P5" else 2):
+                    if position >= len(image):
+                        raise TypeError("The netpbm header is truncated!")
+                    character = image[position:position+1]
+                    if character == b"#":
+                        position = image.find(b"\n", position)
+                        if position < 0:
+                            raise TypeError("The netpbm header is truncated!")
+                    elif character.isspace():
+                        position += 1
+                    else:
+                        end = position
+                        while image[end:end+1].isdigit():
+                            end += 1
+                        if end == position:
+                            raise TypeError("The netpbm header is malformed!")
+                        fields.append(int(image[position:end]))
+                        position = end
+                # A single whitespace character separates the header from the data
+                position += 1
+                width, height = fields[:2]
+                maxval = fields[2] if magic == b"P5" else 1
+                if verbose:
+                    print(
+                        f"This is a {magic.decode('ascii')} netpbm file! {width=}, {height=}, {maxval=}")
+                if not 0 < maxval < 256:
+                    raise TypeError(
+                        f"Unsupported netpbm maximum value {maxval}")
+                row_bytes = width if magic == b"P5" else (width + 7)//8
+                if len(image) < position + height*row_bytes:
+                    raise TypeError(
+                        "The image data is shorter than the netpbm header claims!")
+                rows = []
+                for row_index in range(max(0, height - self.lower_quiet_zone)):
+                    budget.check()
+                    offset = position + row_index*row_bytes
+                    row = image[offset:offset + row_bytes]
+                    if magic == b"P4":
+                        row = b"".join([self.pbm_byte_table[value]
+                                       for value in row])[:width]
+                    elif maxval != 255:
+                        row = bytes(value*255//maxval for value in row)
+                    rows.append(row)
+        return rows
+
+    def read_scanlines(self, image_to_read: str, verbose: bool = False, budget: DecodeBudget = None) -> list[bytes]:
+        """
+        This method returns the 8 bit luminance rows above the lower quiet zone of a png or Netpbm image.
+        The image is opened once and its magic number checked on the handle the reader then uses.
+        """
+        with self.open_image(image_to_read) as filehandle:
+            if self.is_netpbm_file(filehandle):
+                return self.read_netpbm_scanlines(filehandle, verbose, budget)
+            return self.read_png_scanlines(filehandle, verbose, budget)
+
+    def read_png_header(self, filehandle, verbose: bool = False) -> tuple:
+        """
+        This method checks the png signature and the IHDR block of an open png file.
+        It returns width, height, bit depth, colour type, bytes per scanline and bytes per pixel.
+        """
+        # Read the signature first
+        current_line = filehandle.read(
+            len(PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_SIGNATURE))
+        if current_line != PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_SIGNATURE:
+            if verbose:
+                print("This is not a png file!")
+            raise TypeError("This is not a png file!")
+        if verbose:
+            print("This is a png file!")
+
+        # Now get the IHDR block
+        ihdr_length = struct.unpack("!4B", filehandle.read(4))[0]
+        type_ = struct.unpack("!4B", filehandle.read(4))
+        if type_ != PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IHDR:
+            if verbose:
+                print("This is not an IHDR block!")
+            raise TypeError("This is not an IHDR block!")
+        if verbose:
+            print("This is an IHDR block!")
+        data = struct.unpack("!IIBBBBB", filehandle.read(13))
+        width, height, bit_depth, color_type, compression, filter_method, interlace_method = data
+        if verbose:
+            print(
+                f"{width=}, {height=}, {bit_depth=}, {color_type=}, {compression=}, {filter_method=}, {interlace_method=}")
+
+        # Check CRC for this block
+        saved_checksum = struct.unpack("!I", filehandle.read(4))[0]
+        computed_checksum = zlib.crc32(
+            struct.pack("!BBBBIIBBBBB", *type_, *data))
+        if saved_checksum != computed_checksum:
+            if verbose:
+                print(
+                    f"IHDR Checksum failed! Saved was {saved_checksum} and computed was {computed_checksum}")
+            raise TypeError("Checksum failed!")
+        if verbose:
+            print("IHDR Checksum passed!")
+        if bit_depth not in PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_BIT_DEPTHS.get(color_type, ()):
+            raise TypeError(
+                f"Unsupported combination of {color_type=} and {bit_depth=}")
+        if interlace_method != 0:
+            raise TypeError("Interlaced png files are not supported!")
+        bits_per_pixel = PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_CHANNELS[color_type]*bit_depth
+        stride = (width*bits_per_pixel + 7)//8
+        bytes_per_pixel = max(1, bits_per_pixel//8)
+        return width, height, bit_depth, color_type, stride, bytes_per_pixel
+
+    def check_png_chunk_type(self, type_: tuple, verbose: bool = False):
+        """
+        This method raises for critical chunks other than IHDR/PLTE/IDAT/IEND.
+        Ancillary chunks (gAMA, pHYs, tEXt, ...) written by other tools can be skipped.
+        """
+        # Bit 5 of the first byte clear means a critical chunk we cannot ignore
+        if not type_[0] & 0x20 and type_ not in (PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IHDR,
+                                                 PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_PLTE,
+                                                 PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IDAT,
+                                                 PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IEND):
+            if verbose:
+                print(f"Unknown critical block {bytes(type_).decode('latin-1')}!")
+            raise TypeError(
+                f"Unknown critical block {bytes(type_).decode('latin-1')}!")
+
+    def read_png_cache_key(self, png_image_to_read: str, verbose: bool = False) -> tuple:
+        """
+        This method returns the decode cache key of a png image and, only when that key is cached,
+        the hash of its IDAT data to confirm the hit (None otherwise).
+        Only the IHDR and the chunk headers/CRCs are read for the key, the chunk data is skipped
+        and the IDAT data is read back in the same pass only for a cached key.
+        """
+        import hashlib
+
+        idat_chunks = []
+        idat_checksums = []
+        with self.open_image(png_image_to_read) as filehandle:
+            header = self.read_png_header(filehandle, verbose)
+            while True:
+                chunk_head = filehandle.read(8)
+                if len(chunk_head) != 8:
+                    raise TypeError("The png file ended before the IEND block!")
+                chunk_length = struct.unpack("!I", chunk_head[:4])[0]
+                type_ = struct.unpack("!4B", chunk_head[4:])
+                if type_ == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IEND:
+                    break
+                if type_ == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IDAT:
+                    # Remember where the data is in case the key turns out to be cached
+                    idat_chunks.append((filehandle.tell(), chunk_length))
+                    filehandle.seek(chunk_length, 1)
+                    idat_checksums.append(filehandle.read(4))
+                else:
+                    filehandle.seek(chunk_length + 4, 1)
+            key = (header[:4], sum(length for _, length in idat_chunks), b"".join(idat_checksums),
+                   self.decoder_config())
+            if key not in self.decode_cache:
+                return key, None
+            content_hash = hashlib.blake2b(digest_size=32)
+            for offset, length in idat_chunks:
+                filehandle.seek(offset)
+                content_hash.update(filehandle.read(length))
+        return key, content_hash.digest()
+
+    def decoder_config(self) -> tuple:
+        """
+        This method returns everything the decoding depends on, as part of the decode cache key.
+        """
+        return (self.width, self.upper_quiet_zone, self.lower_quiet_zone, self.left_quiet_zone_width,
+                self.right_quiet_zone_width, tuple(self.left_odd_parities.items()),
+                tuple(self.right_even_parities.items()))
+
+    def read_png_scanlines(self, png_image_to_read: str, verbose: bool = False,
+                           budget: DecodeBudget = None, content_hash=None) -> list[bytes]:
+        """
+        This method reads a png image and returns its scanlines as 8 bit luminance rows.
+        All five filter types, colour types 0/2/4/6 and bit depths 1 to 16 are understood.
+        Only the scanlines above the lower quiet zone are inflated and reconstructed since
+        decoding never looks at the rest. budget is checked between the chunks and while inflating.
+        With a hashlib object as content_hash the IDAT data is fed to it while it is read (for the decode cache).
+        """
+        budget = budget or DecodeBudget()
+        budget.begin("read")
+        with self.open_image(png_image_to_read) as filehandle:
+            width, height, bit_depth, color_type, stride, bytes_per_pixel = self.read_png_header(
+                filehandle, verbose)
+
+            # Now collect the IDAT blocks, all chunks are read until IEND
+            idat_blocks = []
+            while True:
+                budget.check()
+                chunk_head = filehandle.read(8)
+                if len(chunk_head) != 8:
+                    raise TypeError("The png file ended before the IEND block!")
+                chunk_length = struct.unpack("!I", chunk_head[:4])[0]
+                type_ = struct.unpack("!4B", chunk_head[4:])
+                self.check_png_chunk_type(type_, verbose)
+                # The CRC is calculated on the chunk type and the chunk data
+                chunk_type_and_data = chunk_head[4:] + \
+                    filehandle.read(chunk_length)
+                saved_checksum = struct.unpack("!I", filehandle.read(4))[0]
+                computed_checksum = zlib.crc32(chunk_type_and_data)
+                if saved_checksum != computed_checksum:
+                    if verbose:
+                        print(
+                            f"{bytes(type_).decode('latin-1')} checksum failed! Saved was {saved_checksum} and computed was {computed_checksum}")
+                    raise TypeError("Checksum failed!")
+                if type_ == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IDAT:
+                    if verbose:
+                        print("IDAT Checksum passed!")
+                    idat_blocks.append(chunk_type_and_data[4:])
+                    if content_hash is not None:
+                        content_hash.update(idat_blocks[-1])
+                elif type_ == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IEND:
+                    break
+            if not idat_blocks:
+                if verbose:
+                    print("This is not an IDAT block!")
+                raise TypeError("This is not an IDAT block!")
+
+        budget.begin("inflate")
+        rows_needed = max(0, height - self.lower_quiet_zone)
+        inflated_needed = self.check_inflated_size(rows_needed*(stride+1))
+        # Inflate only as much as is needed for the rows we look at, in pieces so the budget is checked in between
+        decompressor = zlib.decompressobj()
+        decompressed_data = bytearray()
+        compressed = b"".join(idat_blocks)
+        while compressed and len(decompressed_data) < inflated_needed:
+            decompressed_data += decompressor.decompress(
+                compressed, min(inflated_needed - len(decompressed_data), 1 << 20))
+            compressed = decompressor.unconsumed_tail
+            budget.check()
+        if len(decompressed_data) < inflated_needed:
+            raise TypeError("The image data is shorter than the IHDR claims!")
+        budget.begin("unfilter")
+        return self.inflated_to_scanlines(decompressed_data, (width, height, bit_depth, color_type, stride, bytes_per_pixel),
+                                          rows_needed, budget)
+
+    def check_inflated_size(self, inflated_needed: int) -> int:
+        """
+        This method refuses images whose rows would inflate to more than max_inflate_bytes.
+        """
+        if inflated_needed > self.max_inflate_bytes:
+            raise TypeError(
+                f"The image needs {inflated_needed} inflated bytes, more than {self.max_inflate_bytes=}")
+        return inflated_needed
+
+    def inflated_to_scanlines(self, decompressed_data: bytes, header: tuple, rows: int,
+                              budget: DecodeBudget = None) -> list[bytes]:
+        """
+        This method turns the first rows of inflated png image data into 8 bit luminance rows.
+        header is what read_png_header returns.
+        """
+        width, height, bit_depth, color_type, stride, bytes_per_pixel = header
+        if color_type == 0 and bit_depth == 8 and not any(decompressed_data[:rows*(stride+1):stride+1]):
+            # Unfiltered 8 bit greyscale (what encode writes) is already luminance, no need for numpy
+            return [bytes(decompressed_data[i+1:i+stride+1])
+                    for i in range(0, rows*(stride+1), stride+1)]
+        scanlines = self.unfilter_scanlines(
+            decompressed_data, stride, bytes_per_pixel, rows, budget=budget)
+        luminance = self.scanlines_to_luminance(
+            scanlines, width, bit_depth, color_type)
+        return [row.tobytes() for row in luminance]
+
+    def iter_png_windows(self, png_image_to_read: str, window_rows: int = 256, verbose: bool = False):
+        """
+        This generator streams a png image and yields (first row index, luminance array) for windows of window_rows rows.
+        The file is read and inflated piece by piece so memory stays bounded by the window size
+        whatever the size of the image.
+        """
+        with open(png_image_to_read, "rb") as filehandle:
+            width, height, bit_depth, color_type, stride, bytes_per_pixel = self.read_png_header(
+                filehandle, verbose)
+            window_bytes = window_rows*(stride+1)
+            decompressor = zlib.decompressobj()
+            pending = bytearray()
+            prior = None
+            row_offset = 0
+            while True:
+                chunk_head = filehandle.read(8)
+                if len(chunk_head) != 8:
+                    raise TypeError("The png file ended before the IEND block!")
+                chunk_length = struct.unpack("!I", chunk_head[:4])[0]
+                type_ = struct.unpack("!4B", chunk_head[4:])
+                self.check_png_chunk_type(type_, verbose)
+                if type_ == PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IEND:
+                    break
+                # The CRC is calculated on the chunk type and the chunk data
+                computed_checksum = zlib.crc32(chunk_head[4:])
+                remaining = chunk_length
+                while remaining:
+                    piece = filehandle.read(min(remaining, 1 << 16))
+                    if not piece:
+                        raise TypeError("The png file ended inside a block!")
+                    remaining -= len(piece)
+                    computed_checksum = zlib.crc32(piece, computed_checksum)
+                    if type_ != PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_IDAT:
+                        continue
+                    while piece and row_offset < height:
+                        # Never inflate more than what fills the current window
+                        pending += decompressor.decompress(
+                            piece, window_bytes - len(pending))
+                        piece = decompressor.unconsumed_tail
+                        if len(pending) == window_bytes:
+                            rows = min(window_rows, height - row_offset)
+                            scanlines = self.unfilter_scanlines(
+                                pending, stride, bytes_per_pixel, rows, prior)
+                            prior = scanlines[-1].copy()
+                            yield row_offset, self.scanlines_to_luminance(scanlines, width, bit_depth, color_type)
+                            row_offset += rows
+                            pending.clear()
+                saved_checksum = struct.unpack("!I", filehandle.read(4))[0]
+                if saved_checksum != computed_checksum:
+                    if verbose:
+                        print(
+                            f"{bytes(type_).decode('latin-1')} checksum failed! Saved was {saved_checksum} and computed was {computed_checksum}")
+                    raise TypeError("Checksum failed!")
+            rows = min(len(pending)//(stride+1), height - row_offset)
+            if rows:
+                scanlines = self.unfilter_scanlines(
+                    pending, stride, bytes_per_pixel, rows, prior)
+                yield row_offset, self.scanlines_to_luminance(scanlines, width, bit_depth, color_type)
+                row_offset += rows
+            if row_offset < height:
+                raise TypeError("The image data is shorter than the IHDR claims!")
+
+    def unfilter_scanlines(self, decompressed_data: bytes, stride: int, bytes_per_pixel: int, rows: int,
+                           prior: np.ndarray = None, budget: DecodeBudget = None) -> np.ndarray:
+        """
+        This method reverses the per row png filters and returns a (rows, stride) uint8 array.
+        prior is the reconstructed row just above the first one when the image is read in pieces.
+        budget is checked before every Average/Paeth row, the only ones reconstructed in Python.
+        See https://www.w3.org/TR/png/#9Filters for the five filter types.
+        """
+        import numpy as np
+        budget = budget or DecodeBudget()
+        filtered = np.frombuffer(decompressed_data, dtype=np.uint8,
+                                 count=rows*(stride+1)).reshape(rows, stride+1)
+        filter_types = filtered[:, 0]
+        if (filter_types > 4).any():
+            raise TypeError(
+                f"Unknown filter type {filter_types[filter_types > 4][0]}")
+        scanlines = filtered[:, 1:].copy()
+        # None (0) rows are already done and Sub (1) rows only depend on themselves,
+        # so all of them are reconstructed at once with a running sum per byte lane
+        sub_rows = np.flatnonzero(filter_types == 1)
+        if len(sub_rows):
+            lanes = scanlines[sub_rows].reshape(
+                len(sub_rows), -1, bytes_per_pixel)
+            scanlines[sub_rows] = np.cumsum(
+                lanes, axis=1, dtype=np.uint8).reshape(len(sub_rows), stride)
+        # Up (2), Average (3) and Paeth (4) depend on the row above so go top to bottom
+        prior_dependent_rows = np.flatnonzero(filter_types >= 2)
+        index = 0
+        while index < len(prior_dependent_rows):
+            row = prior_dependent_rows[index]
+            if row:
+                prior = scanlines[row-1]
+            elif prior is None:
+                prior = np.zeros(stride, dtype=np.uint8)
+            if filter_types[row] == 2:
+                # A run of Up rows is the row above plus a running sum down the columns
+                end = index
+                while end + 1 < len(prior_dependent_rows) and \
+                        prior_dependent_rows[end+1] == row + end + 1 - index and \
+                        filter_types[prior_dependent_rows[end+1]] == 2:
+                    end += 1
+                last_row = row + end - index
+                scanlines[row:last_row+1] = prior + np.cumsum(
+                    scanlines[row:last_row+1], axis=0, dtype=np.uint8)
+                index = end + 1
+                continue
+            budget.check()
+            current = bytearray(scanlines[row].tobytes())
+            above = prior.tobytes()
+            if filter_types[row] == 3:
+                for x in range(stride):
+                    left = current[x-bytes_per_pixel] if x >= bytes_per_pixel else 0
+                    current[x] = (current[x] + ((left + above[x]) >> 1)) & 0xFF
+            else:
+                for x in range(stride):
+                    if x >= bytes_per_pixel:
+                        left = current[x-bytes_per_pixel]
+                        upper_left = above[x-bytes_per_pixel]
+                    else:
+                        left, upper_left = 0, 0
+                    upper = above[x]
+                    p = left + upper - upper_left
+                    pa, pb, pc = abs(p - left), abs(p - upper), abs(p - upper_left)
+                    if pa <= pb and pa <= pc:
+                        predictor = left
+                    elif pb <= pc:
+                        predictor = upper
+                    else:
+                        predictor = upper_left
+                    current[x] = (current[x] + predictor) & 0xFF
+            scanlines[row] = np.frombuffer(current, dtype=np.uint8)
+            index += 1
+        return scanlines
+
+    def scanlines_to_luminance(self, scanlines: np.ndarray, width: int, bit_depth: int, color_type: int) -> np.ndarray:
+        """
+        This method converts reconstructed scanlines into a (rows, width) 8 bit luminance array.
+        Colour is weighted as per ITU-R BT.601 and transparency is composited over white paper.
+        """
+        import numpy as np
+        rows = scanlines.shape[0]
+        channels = PoorMans1DBarCodeEncoderDecoder_UPC_A.PNG_CHANNELS[color_type]
+        if bit_depth < 8:
+            # Only greyscale is allowed below 8 bits. Unpack and scale the samples to 0..255
+            bits = np.unpackbits(scanlines, axis=1)[
+                :, :width*bit_depth].reshape(rows, width, bit_depth)
+            weights = 1 << np.arange(bit_depth-1, -1, -1)
+            values = (bits*weights).sum(axis=2)
+            return (values*255//((1 << bit_depth) - 1)).astype(np.uint8)
+        if bit_depth == 16:
+            # Keep the most significant byte of every sample
+            scanlines = scanlines[:, ::2]
+        samples = scanlines.reshape(rows, width, channels)
+        if channels == 1:
+            return samples[:, :, 0].copy()
+        samples = samples.astype(np.uint32)
+        if color_type in (2, 6):
+            luminance = (299*samples[:, :, 0] + 587*samples[:, :, 1] +
+                         114*samples[:, :, 2] + 500)//1000
+        else:
+            luminance = samples[:, :, 0]
+        if color_type in (4, 6):
+            alpha = samples[:, :, -1]
+            luminance = (luminance*alpha + 255*(255 - alpha) + 127)//255
+        return luminance.astype(np.uint8)
+
+    def compute_checksum(self, number: str) -> int:
+        """
+        This method computes the check digit for the given digits (without the check digit).
+        """
+        odd_sum = sum(map(lambda x: int(x)*3, number[::2]))
+        even_sum = sum(map(lambda x: int(x), number[1:-1:2]))
+        total_sum = odd_sum + even_sum
+        mod_10 = total_sum % 10
+        return (10 - mod_10) % 10
+
+    def encode(self, number_to_encode: str, image_format: str = "png"):
+        """
+        Given a number in a string form, this method creates an eps image having the bar codes.
+        image_format is png, or pgm/pbm (uncompressed Netpbm) for the fastest local hand-offs.
+        """
+        quiet_zone_left = self.left_quiet_zone_width*self.width  # Left quiet zone
+        left_guard_width = 3*self.width  # Left guard is 101
+        left_numbers_width = 7*6*self.width  # Left 6 numbers
+        center_separator_width = 5*self.width  # Center separator is 01010
+        right_numbers_width = 7*5*self.width  # Right 5 numbers
+        right_guard_width = 3*self.width  # Right guard is 101
+        check_sum_width = 7*1*self.width
+        quiet_zone_right = self.right_quiet_zone_width*self.width  # Right quiet zone
+        options_dict = {
+            "barcode_width": quiet_zone_left +
+            left_guard_width +
+            left_numbers_width +
+            center_separator_width +
+            right_numbers_width +
+            right_guard_width +
+            check_sum_width +
+            quiet_zone_right
+        }
+        data = []
+        for i in range(self.upper_quiet_zone):
+            data.append([255]*options_dict["barcode_width"])
+        for _ in range(self.height-self.upper_quiet_zone-self.lower_quiet_zone):
+            row = []
+            # Write left quiet zone
+            for _ in range(self.left_quiet_zone_width):
+                for _ in range(self.width):
+                    row.append(0)
+            # Write left guard 101
+            for digit in "101":
+                for _ in range(self.width):
+                    row.append(int(digit))
+            # Write left 6 digits
+            for digit in number_to_encode[:6:]:
+                for number in self.left_odd_parities[digit]:
+                    for _ in range(self.width):
+                        row.append(int(number))
+            # Write center separator
+            for digit in "01010":
+                for _ in range(self.width):
+                    row.append(int(digit))
+            # Write right 5 digits
+            for digit in number_to_encode[6:11:]:
+                for number in self.right_even_parities[digit]:
+                    for _ in range(self.width):
+                        row.append(int(number))
+            # Write checksum
+            inverse_mod_10 = self.compute_checksum(number_to_encode)
+            encoded_checksum = self.right_even_parities[str(inverse_mod_10)]
+            for number in encoded_checksum:
+                for _ in range(self.width):
+                    row.append(int(number))
+            # Write right guard 101
+            for digit in "101":
+                for _ in range(self.width):
+                    row.append(int(digit))
+            # Write right quiet zone
+            for _ in range(self.right_quiet_zone_width):
+                for _ in range(self.width):
+                    row.append(0)
+            # # invert since 0 means black and 1 means white
+            row = [255 if x == 0 else 0 for x in row]
+            data.append(row)
+            # Append row
+        for i in range(self.lower_quiet_zone):
+            data.append([255]*options_dict["barcode_width"])
+        # Create png (or pgm/pbm) file
+        bytes_returned = self.create_image_file(
+            data, image_format, **options_dict)
+        with open(f"Barcode_upc_a_{number_to_encode}-{inverse_mod_10}.{image_format}", "wb") as filehandle:
+            filehandle.write(bytes_returned)
+
+    def decode(self, png_image_to_read: bytes, verbose: bool = False,
+               timeout: float = None, deadline: float = None, cancel=None) -> str:
+        """
+        This method decodes the png image into the number.
+        With decode_cache_size set, images decoded before are answered from the cache without inflating them.
+        A cache hit is only trusted when the hash of the image data matches too.
+        timeout (seconds), deadline (a time.monotonic() value) and cancel (e.g. a threading.Event) bound the decode,
+        which then raises DecodeTimeoutError with the time spent in every stage so far.
+        """
+        budget = DecodeBudget(timeout, deadline, cancel)
+        if not self.decode_cache_size:
+            return self.decode_uncached(png_image_to_read, verbose, budget)
+        import hashlib
+
+        # The key, the hash and the image data all come from the same open file
+        with self.open_image(png_image_to_read) as filehandle:
+            if self.is_netpbm_file(filehandle):
+                # Netpbm images are not compressed so there is nothing to save by caching them
+                return self.decode_uncached(filehandle, verbose, budget)
+            budget.begin("cache")
+            key, cached_hash = self.read_png_cache_key(filehandle, verbose)
+            cached = self.decode_cache.get(key)
+            if cached and cached[0] == cached_hash:
+                self.decode_cache.move_to_end(key)
+                if verbose:
+                    print(f"Decoded from the cache. The barcode is {cached[1]}")
+                return cached[1]
+            # On a miss the reader hashes the IDAT data it reads anyway
+            content_hash = hashlib.blake2b(digest_size=32)
+            decoded = self.decode_scanlines(self.read_png_scanlines(
+                filehandle, verbose, budget, content_hash), verbose, budget)
+        self.decode_cache[key] = (content_hash.digest(), decoded)
+        self.decode_cache.move_to_end(key)
+        while len(self.decode_cache) > self.decode_cache_size:
+            self.decode_cache.popitem(last=False)
+        return decoded
+
+    def decode_uncached(self, png_image_to_read: bytes, verbose: bool = False, budget: DecodeBudget = None) -> str:
+        """
+        This method decodes the png (or Netpbm) image into the number.
+        The URL https://pyokagan.name/blog/2019-10-14-png/ has been used as a starting reference
+        """
+        budget = budget or DecodeBudget()
+        # The lower quiet zone is never read by the readers
+        return self.decode_scanlines(self.read_scanlines(png_image_to_read, verbose, budget), verbose, budget)
+
+    def decode_scanlines(self, data_block_: list[bytes], verbose: bool = False, budget: DecodeBudget = None) -> str:
+        """
+        This method decodes the 8 bit luminance rows of an image (lower quiet zone left out) into the number.
+        """
+        import hashlib
+
+        budget = budget or DecodeBudget()
+        budget.begin("verify_rows")
+        # Quick check all rows are same/redundant so that we can just focus on 1st scanline apart from the upper and lower quiet zone
+        m = hashlib.sha1()
+        m.update(data_block_[self.upper_quiet_zone:][0])
+        first_row_checksum = m.hexdigest()
+        for row_index, row in enumerate(data_block_[self.upper_quiet_zone:]):
+            budget.check()
+            m1 = hashlib.sha1()
+            m1.update(row)
+            if m1.hexdigest() != first_row_checksum:
+                raise ValueError(
+                    f"Something strange. We were expecting all rows to be same but at least index {row_index} is different!")
+        # Remove the upper quiet zone. All the rows left are the same so only the first one is needed
+        budget.begin("digits")
+        relevant_data = list(data_block_[self.upper_quiet_zone])
+        # Get left quiet zone
+        left_quiet_zone = relevant_data[:
+                                        self.left_quiet_zone_width*self.width]
+        if any(map(lambda x: x != 255, left_quiet_zone)):
+            raise ValueError("Identification of left quiet zone failed")
+        relevant_data = relevant_data[self.left_quiet_zone_width*self.width:]
+        # Get left guard
+        left_guard = relevant_data[:3*self.width]
+        if left_guard != [0]*self.width + [255]*self.width + [0]*self.width:
+            raise ValueError("Identification of left guard failed")
+        relevant_data = relevant_data[3*self.width:]
+        # Get left 6 digits
+        left_numbers = relevant_data[:6*7*self.width]
+        numbers_read = []
+        reverse_left_odd_parities = self.reverse_left_odd_parities
+        for i in range(6):
+            read_key = ""
+            for j in range(7):
+                chunk = left_numbers[:self.width]
+                if chunk == [0]*self.width:
+                    read_key += "1"
+                else:
+                    read_key += "0"
+                left_numbers = left_numbers[self.width:]
+            numbers_read.append(reverse_left_odd_parities.get(read_key))
+        relevant_data = relevant_data[6*7*self.width:]
+        # Get middle separator
+        middle_separator = relevant_data[:5*self.width]
+        if middle_separator != [255]*self.width + [0]*self.width + [255]*self.width + [0]*self.width + [255]*self.width:
+            raise ValueError("Identification of middle separator failed")
+        relevant_data = relevant_data[5*self.width:]
+
+        # Get right 5 digits
+        right_numbers = relevant_data[:5*7*self.width]
+        reverse_right_even_parities = self.reverse_right_even_parities
+        for i in range(5):
+            read_key = ""
+            for j in range(7):
+                chunk = right_numbers[:self.width]
+                if chunk == [0]*self.width:
+                    read_key += "1"
+                else:
+                    read_key += "0"
+                right_numbers = right_numbers[self.width:]
+            numbers_read.append(reverse_right_even_parities.get(read_key))
+        relevant_data = relevant_data[5*7*self.width:]
+        # Get the checksum
+        checksum_digits = relevant_data[:7*self.width]
+        checksum_digits = [
+            1 if x == 0 else 0 for x in checksum_digits[::self.width]]
+        stored_checksum = reverse_right_even_parities.get(
+            "".join(list(map(str, checksum_digits))))
+        computed_checksum = self.compute_checksum(numbers_read)
+        if stored_checksum != str(computed_checksum):
+            raise ValueError(
+                f"Identification of checksum failed. Stored={stored_checksum} Computed={computed_checksum}")
+        relevant_data = relevant_data[7*self.width:]
+        # Get right guard
+        right_guard = relevant_data[:3*self.width]
+        if right_guard != [0]*self.width + [255]*self.width + [0]*self.width:
+            raise ValueError("Identification of right guard failed")
+        relevant_data = relevant_data[3*self.width:]
+        # Get the right quiet zone
+        right_quiet_zone = relevant_data
+        if right_quiet_zone != [255]*self.right_quiet_zone_width*self.width:
+            raise ValueError("Identification of right quiet zone failed")
+        if verbose:
+            print(
+                f"Decoding complete. The barcode is {''.join(numbers_read)}-{computed_checksum}")
+
+        return "".join(numbers_read)
+
+
+if __name__ == "__main__":
+
+    my_1_d_bar_obj = PoorMans1DBarCodeEncoderDecoder_UPC_A()
+    my_1_d_bar_obj.encode("13600029145")
+    # Verify the generated image by uploading in an online tool like below
+    # https://orcascan.com/tools/gs1-barcode-decoder?barcode=0036000291452
+    my_1_d_bar_obj.decode("Barcode_upc_a_13600029145-9.png", True)
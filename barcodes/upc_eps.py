@@ -1,7 +1,6 @@
 """
 This module implements various 1D barcode encoders and decoders.
 """
-import turtle
 import re
 
 
@@ -23,6 +22,8 @@ class PoorMans1DBarCodeEncoderDecoder_UPC_A:
         self.height = height
         self.left_odd_parities = left_odd_parities
         self.right_even_parities = right_even_parities
+        # turtle pulls in Tk so it is only imported when an eps encoder/decoder is created
+        import turtle
         self.screen = turtle.Screen()
         self.screen.screensize(200*self.width, self.height+20)
         self.screen.setup(1.0, 1.0)
@@ -0,0 +1,42 @@
+"""
+Regression tests for resynchronising the stream decoder after a broken image.
+"""
+import os
+import tempfile
+import unittest
+
+from barcodes import get_symbology
+from barcodes.stream import PoorMans1DBarCodeStreamDecoder
+
+
+class StreamResyncTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # encode writes into the current directory
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                get_symbology("upc-a")().encode("13600029145")
+                with open("Barcode_upc_a_13600029145-9.png", "rb") as filehandle:
+                    cls.frame = filehandle.read()
+            finally:
+                os.chdir(cwd)
+
+    def decoded(self, data: bytes) -> list:
+        decoder = PoorMans1DBarCodeStreamDecoder(("upc-a",))
+        results = decoder.feed(data) + decoder.close()
+        return [result["digits"] for result in results if result["error"] is None]
+
+    def test_stray_bytes_before_an_image(self):
+        self.assertEqual(self.decoded(b"\x00\x00" + self.frame), ["13600029145"])
+
+    def test_truncated_image_before_good_ones(self):
+        for cut in range(1, len(self.frame)):
+            with self.subTest(cut=cut):
+                self.assertEqual(self.decoded(self.frame[:cut] + self.frame*3), ["13600029145"]*3)
+
+
+if __name__ == "__main__":
+    unittest.main()